@@ -6,7 +6,7 @@ import uuid
 import bcrypt
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, current_app
 from sqlalchemy import Column, String, Enum as SQLEnum, DateTime, Text
 from sqlalchemy.dialects.mysql import CHAR
 from flask_sqlalchemy import SQLAlchemy
@@ -63,6 +63,17 @@ def verify_password(password, password_hash):
     return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
 
 
+def load_user_settings(user):
+    """Parse a user's settings JSON text, or return {} if it is empty or invalid"""
+    if not user.settings:
+        return {}
+    try:
+        # app.json is the orjson-backed provider
+        return current_app.json.loads(user.settings)
+    except ValueError:
+        return {}
+
+
 def get_current_user():
     """Get the current authenticated user from the session cookie"""
     session_id = request.cookies.get('session_id')
@@ -70,9 +81,7 @@ def get_current_user():
         return None
     
     # Find valid session
-    session = db.session.execute(
-        db.select(Session).filter_by(session_id=session_id)
-    ).scalar_one_or_none()
+    session = db.session.get(Session, session_id)
     
     if not session:
         return None
@@ -84,9 +93,7 @@ def get_current_user():
         return None
     
     # Get user
-    user = db.session.execute(
-        db.select(User).filter_by(id=session.user_id)
-    ).scalar_one_or_none()
+    user = db.session.get(User, session.user_id)
     
     return user
 
@@ -133,8 +140,8 @@ def is_test_database():
         ).scalar_one_or_none()
         
         return jsonify({"is_test": test_user is not None})
-    except Exception as e:
-        print(f"Error checking test database: {e}")
+    except Exception:
+        current_app.logger.exception("Error checking test database")
         return jsonify({"is_test": False})
 
 
@@ -203,9 +210,7 @@ def logout():
     
     if session_id:
         # Delete session from database
-        session = db.session.execute(
-            db.select(Session).filter_by(session_id=session_id)
-        ).scalar_one_or_none()
+        session = db.session.get(Session, session_id)
         
         if session:
             db.session.delete(session)
@@ -229,13 +234,7 @@ def get_me():
     user = get_current_user()
     
     # Parse settings JSON
-    import json
-    settings = {}
-    if user.settings:
-        try:
-            settings = json.loads(user.settings)
-        except:
-            settings = {}
+    settings = load_user_settings(user)
     
     return jsonify({
         "id": user.id,
@@ -254,13 +253,7 @@ def get_settings():
     """
     user = get_current_user()
     
-    import json
-    settings = {}
-    if user.settings:
-        try:
-            settings = json.loads(user.settings)
-        except:
-            settings = {}
+    settings = load_user_settings(user)
     
     return jsonify(settings)
 
@@ -287,19 +280,13 @@ def update_settings():
             return jsonify({"error": "Invalid unit value. Allowed: metric, us"}), 400
     
     # Parse existing settings
-    import json
-    settings = {}
-    if user.settings:
-        try:
-            settings = json.loads(user.settings)
-        except:
-            settings = {}
+    settings = load_user_settings(user)
     
     # Merge new settings
     settings.update(data)
     
     # Save updated settings
-    user.settings = json.dumps(settings)
+    user.settings = current_app.json.dumps(settings)
     db.session.commit()
     
     return jsonify(settings)
@@ -344,20 +331,15 @@ def change_password():
 @admin_required
 def admin_list_recipes():
     """Admin endpoint to list all recipes"""
-    from app import Recipe, serialize_recipe
-    try:
-        recipes = db.session.execute(db.select(Recipe)).scalars().all()
-        return jsonify([serialize_recipe(r) for r in recipes])
-    except Exception as e:
-        print(f"Database error in admin_list_recipes: {e}")
-        return jsonify({"error": "Failed to fetch recipes from database."}), 500
+    from app import stream_recipe_list
+    return stream_recipe_list('admin_list_recipes')
 
 
 @auth_bp.route('/admin/recipes', methods=['POST'])
 @admin_required
 def admin_create_recipe():
     """Admin endpoint to create a new recipe"""
-    from app import Recipe, RecipeIngredient, serialize_recipe
+    from app import Recipe, RecipeIngredient, get_lazy_recipe
     try:
         data = request.get_json()
         
@@ -374,27 +356,23 @@ def admin_create_recipe():
         db.session.add(new_recipe)
         db.session.flush()  # Get the recipe_id
         
-        # Add ingredients if provided
-        ingredients_data = data.get('ingredients', [])
-        for ing_data in ingredients_data:
-            ingredient_id = ing_data.get('ingredient_id')
-            if not ingredient_id:
-                continue
-                
-            new_recipe_ingredient = RecipeIngredient(
-                recipe_id=new_recipe.recipe_id,
-                ingredient_id=ingredient_id,
-                quantity=ing_data.get('quantity'),
-                unit_id=ing_data.get('unit_id'),
-                notes=ing_data.get('notes')
-            )
-            db.session.add(new_recipe_ingredient)
+        # Add ingredients if provided, as one multi-row INSERT
+        ingredient_rows = [{
+            'recipe_id': new_recipe.recipe_id,
+            'ingredient_id': ing_data.get('ingredient_id'),
+            'quantity': ing_data.get('quantity'),
+            'unit_id': ing_data.get('unit_id'),
+            'notes': ing_data.get('notes')
+        } for ing_data in data.get('ingredients', []) if ing_data.get('ingredient_id')]
+        if ingredient_rows:
+            db.session.execute(db.insert(RecipeIngredient), ingredient_rows)
         
         db.session.commit()
-        return jsonify(serialize_recipe(new_recipe)), 201
-    except Exception as e:
+        # The bulk insert bypasses new_recipe.ingredients, so the response is read back from rows
+        return jsonify(get_lazy_recipe(new_recipe.recipe_id).to_dict()), 201
+    except Exception:
         db.session.rollback()
-        print(f"Error creating recipe: {e}")
+        current_app.logger.exception("Error creating recipe")
         return jsonify({"error": "Failed to create recipe"}), 500
 
 
@@ -402,12 +380,12 @@ def admin_create_recipe():
 @admin_required
 def admin_update_recipe(recipe_id):
     """Admin endpoint to update a recipe"""
-    from app import Recipe, RecipeIngredient, serialize_recipe
+    from app import Recipe, RECIPE_WRITABLE_FIELDS, sync_recipe_ingredients, get_lazy_recipe
     try:
-        recipe = db.session.execute(db.select(Recipe).filter_by(recipe_id=recipe_id)).scalar_one_or_none()
+        recipe = db.session.get(Recipe, recipe_id)
         if recipe is None:
             return jsonify({"error": "Recipe not found."}), 404
-    except Exception as e:
+    except Exception:
         return jsonify({"error": "Failed to fetch recipe from database."}), 500
     
     data = request.get_json()
@@ -415,65 +393,25 @@ def admin_update_recipe(recipe_id):
     # Handle ingredients separately if provided
     ingredients_data = data.get('ingredients', None)
     
-    # Filter out relationship fields that should not be directly set
-    fields_to_skip = ['ingredients', 'tags', 'parent_recipe', 'variants']
-    
-    # Update basic recipe fields
+    # Update basic recipe fields; relationships and unknown keys are ignored
     for key, value in data.items():
-        if key in fields_to_skip:
-            continue
-        if hasattr(recipe, key):
+        if key in RECIPE_WRITABLE_FIELDS:
             setattr(recipe, key, value)
     
     # Handle ingredients update if provided
     if ingredients_data is not None:
         try:
-            # Get current ingredient IDs for this recipe
-            current_ingredients = {ri.ingredient_id: ri for ri in recipe.ingredients}
-            
-            # Get incoming ingredient IDs
-            incoming_ingredient_ids = set()
-            
-            for ing_data in ingredients_data:
-                ingredient_id = ing_data.get('ingredient_id')
-                if not ingredient_id:
-                    continue
-                
-                incoming_ingredient_ids.add(ingredient_id)
-                
-                # Check if this ingredient already exists in the recipe
-                if ingredient_id in current_ingredients:
-                    # Update existing ingredient
-                    recipe_ingredient = current_ingredients[ingredient_id]
-                    recipe_ingredient.quantity = ing_data.get('quantity', recipe_ingredient.quantity)
-                    recipe_ingredient.unit_id = ing_data.get('unit_id', recipe_ingredient.unit_id)
-                    recipe_ingredient.notes = ing_data.get('notes', recipe_ingredient.notes)
-                else:
-                    # Add new ingredient
-                    new_recipe_ingredient = RecipeIngredient(
-                        recipe_id=recipe.recipe_id,
-                        ingredient_id=ingredient_id,
-                        quantity=ing_data.get('quantity'),
-                        unit_id=ing_data.get('unit_id'),
-                        notes=ing_data.get('notes')
-                    )
-                    db.session.add(new_recipe_ingredient)
-            
-            # Remove ingredients that are no longer in the list
-            for ingredient_id in current_ingredients:
-                if ingredient_id not in incoming_ingredient_ids:
-                    db.session.delete(current_ingredients[ingredient_id])
-                    
-        except Exception as e:
-            print(f"Error updating ingredients: {e}")
+            sync_recipe_ingredients(recipe.recipe_id, ingredients_data)
+        except Exception:
+            current_app.logger.exception("Error updating ingredients")
             return jsonify({"error": "Failed to update ingredients"}), 500
     
     try:
         db.session.commit()
-        return jsonify(serialize_recipe(recipe))
-    except Exception as e:
+        return jsonify(get_lazy_recipe(recipe_id).to_dict())
+    except Exception:
         db.session.rollback()
-        print(f"Database commit error: {e}")
+        current_app.logger.exception("Database commit error")
         return jsonify({"error": "Database commit failure"}), 500
 
 
@@ -483,16 +421,16 @@ def admin_delete_recipe(recipe_id):
     """Admin endpoint to delete a recipe"""
     from app import Recipe
     try:
-        recipe = db.session.execute(db.select(Recipe).filter_by(recipe_id=recipe_id)).scalar_one_or_none()
+        recipe = db.session.get(Recipe, recipe_id)
         if recipe is None:
             return jsonify({"error": "Recipe not found."}), 404
         
         db.session.delete(recipe)
         db.session.commit()
         return jsonify({"message": "Recipe deleted successfully"}), 200
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error deleting recipe: {e}")
+        current_app.logger.exception("Error deleting recipe")
         return jsonify({"error": "Failed to delete recipe"}), 500
 
 
@@ -500,13 +438,20 @@ def admin_delete_recipe(recipe_id):
 @admin_required
 def admin_list_ingredients():
     """Admin endpoint to list all ingredients"""
-    from app import Ingredient, serialize_ingredient
+    from app import INGREDIENT_LIST_STMT, load_ingredient_prices, serialize_ingredient_row, stream_row_list
     try:
-        ingredients = db.session.execute(db.select(Ingredient)).scalars().all()
-        return jsonify([serialize_ingredient(i) for i in ingredients])
-    except Exception as e:
-        print(f"Database error in admin_list_ingredients: {e}")
+        # Prices are read first: no other query can run while the ingredient rows stream
+        prices_by_ingredient = load_ingredient_prices()
+    except Exception:
+        current_app.logger.exception("Database error in admin_list_ingredients")
         return jsonify({"error": "Failed to fetch ingredients from database."}), 500
+    # Streamed a partition at a time; the public list is buffered instead so it can carry an ETag
+    return stream_row_list(
+        INGREDIENT_LIST_STMT,
+        lambda rows: [serialize_ingredient_row(row, prices_by_ingredient[row.ingredient_id]) for row in rows],
+        'admin_list_ingredients',
+        "Failed to fetch ingredients from database."
+    )
 
 
 @auth_bp.route('/admin/ingredients', methods=['POST'])
@@ -530,9 +475,9 @@ def admin_create_ingredient():
         db.session.add(new_ingredient)
         db.session.commit()
         return jsonify(serialize_ingredient(new_ingredient)), 201
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error creating ingredient: {e}")
+        current_app.logger.exception("Error creating ingredient")
         return jsonify({"error": "Failed to create ingredient"}), 500
 
 
@@ -542,9 +487,7 @@ def admin_update_ingredient(ingredient_id):
     """Admin endpoint to update an ingredient"""
     from app import Ingredient, serialize_ingredient
     try:
-        ingredient = db.session.execute(
-            db.select(Ingredient).filter_by(ingredient_id=ingredient_id)
-        ).scalar_one_or_none()
+        ingredient = db.session.get(Ingredient, ingredient_id)
         
         if ingredient is None:
             return jsonify({"error": "Ingredient not found."}), 404
@@ -567,9 +510,9 @@ def admin_update_ingredient(ingredient_id):
         
         db.session.commit()
         return jsonify(serialize_ingredient(ingredient))
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error updating ingredient: {e}")
+        current_app.logger.exception("Error updating ingredient")
         return jsonify({"error": "Failed to update ingredient"}), 500
 
 
@@ -577,18 +520,16 @@ def admin_update_ingredient(ingredient_id):
 @admin_required
 def admin_delete_ingredient(ingredient_id):
     """Admin endpoint to delete an ingredient"""
-    from app import Ingredient
+    from app import Ingredient, ingredient_recipe_names
     try:
-        ingredient = db.session.execute(
-            db.select(Ingredient).filter_by(ingredient_id=ingredient_id)
-        ).scalar_one_or_none()
+        ingredient = db.session.get(Ingredient, ingredient_id)
         
         if ingredient is None:
             return jsonify({"error": "Ingredient not found."}), 404
         
         # Check if ingredient is used in any recipes
-        if ingredient.recipe_items:
-            recipe_names = [ri.recipe.name for ri in ingredient.recipe_items]
+        recipe_names = ingredient_recipe_names(ingredient_id)
+        if recipe_names:
             recipes_str = ", ".join(recipe_names)
             return jsonify({
                 "error": f"Cannot delete ingredient '{ingredient.name}' because it is used in the following recipe(s): {recipes_str}. Please remove it from these recipes first."
@@ -597,9 +538,9 @@ def admin_delete_ingredient(ingredient_id):
         db.session.delete(ingredient)
         db.session.commit()
         return jsonify({"message": "Ingredient deleted successfully"}), 200
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error deleting ingredient: {e}")
+        current_app.logger.exception("Error deleting ingredient")
         return jsonify({"error": "Failed to delete ingredient"}), 500
 
 
@@ -609,13 +550,14 @@ def admin_delete_ingredient(ingredient_id):
 @admin_required
 def admin_list_ingredient_groups():
     """Admin endpoint to list all ingredient groups"""
-    from app import IngredientGroup, serialize_ingredient_group
-    try:
-        groups = db.session.execute(db.select(IngredientGroup)).scalars().all()
-        return jsonify([serialize_ingredient_group(g) for g in groups])
-    except Exception as e:
-        print(f"Database error in admin_list_ingredient_groups: {e}")
-        return jsonify({"error": "Failed to fetch ingredient groups from database."}), 500
+    from app import INGREDIENT_GROUP_LIST_STMT, serialize_described_rows, stream_row_list
+    # Streamed a partition at a time; the public list is buffered instead so it can carry an ETag
+    return stream_row_list(
+        INGREDIENT_GROUP_LIST_STMT,
+        lambda rows: serialize_described_rows(rows, 'group_id'),
+        'admin_list_ingredient_groups',
+        "Failed to fetch ingredient groups from database."
+    )
 
 
 @auth_bp.route('/admin/ingredient-groups', methods=['POST'])
@@ -635,9 +577,9 @@ def admin_create_ingredient_group():
         db.session.add(new_group)
         db.session.commit()
         return jsonify(serialize_ingredient_group(new_group)), 201
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error creating ingredient group: {e}")
+        current_app.logger.exception("Error creating ingredient group")
         return jsonify({"error": "Failed to create ingredient group"}), 500
 
 
@@ -647,9 +589,7 @@ def admin_update_ingredient_group(group_id):
     """Admin endpoint to update an ingredient group"""
     from app import IngredientGroup, serialize_ingredient_group
     try:
-        group = db.session.execute(
-            db.select(IngredientGroup).filter_by(group_id=group_id)
-        ).scalar_one_or_none()
+        group = db.session.get(IngredientGroup, group_id)
         
         if group is None:
             return jsonify({"error": "Ingredient group not found."}), 404
@@ -664,9 +604,9 @@ def admin_update_ingredient_group(group_id):
         
         db.session.commit()
         return jsonify(serialize_ingredient_group(group))
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error updating ingredient group: {e}")
+        current_app.logger.exception("Error updating ingredient group")
         return jsonify({"error": "Failed to update ingredient group"}), 500
 
 
@@ -674,18 +614,16 @@ def admin_update_ingredient_group(group_id):
 @admin_required
 def admin_delete_ingredient_group(group_id):
     """Admin endpoint to delete an ingredient group"""
-    from app import IngredientGroup
+    from app import IngredientGroup, group_in_use, count_group_recipes
     try:
-        group = db.session.execute(
-            db.select(IngredientGroup).filter_by(group_id=group_id)
-        ).scalar_one_or_none()
+        group = db.session.get(IngredientGroup, group_id)
         
         if group is None:
             return jsonify({"error": "Ingredient group not found."}), 404
         
-        # Check if group is used in any recipes
-        if group.recipe_ingredients:
-            recipe_count = len(set(ri.recipe_id for ri in group.recipe_ingredients))
+        # Check if group is used in any recipes; the count is only needed for the error message
+        if group_in_use(group_id):
+            recipe_count = count_group_recipes(group_id)
             return jsonify({
                 "error": f"Cannot delete ingredient group '{group.name}' because it is used in {recipe_count} recipe(s). The group will be removed from those recipes if you delete it."
             }), 400
@@ -693,9 +631,9 @@ def admin_delete_ingredient_group(group_id):
         db.session.delete(group)
         db.session.commit()
         return jsonify({"message": "Ingredient group deleted successfully"}), 200
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error deleting ingredient group: {e}")
+        current_app.logger.exception("Error deleting ingredient group")
         return jsonify({"error": "Failed to delete ingredient group"}), 500
 
 
@@ -703,13 +641,7 @@ def admin_delete_ingredient_group(group_id):
 
 def serialize_user(user):
     """Convert a User ORM object to a dictionary"""
-    import json
-    settings = {}
-    if user.settings:
-        try:
-            settings = json.loads(user.settings)
-        except:
-            settings = {}
+    settings = load_user_settings(user)
     
     return {
         'id': user.id,
@@ -728,8 +660,8 @@ def admin_list_users():
     try:
         users = db.session.execute(db.select(User)).scalars().all()
         return jsonify([serialize_user(u) for u in users])
-    except Exception as e:
-        print(f"Database error in admin_list_users: {e}")
+    except Exception:
+        current_app.logger.exception("Database error in admin_list_users")
         return jsonify({"error": "Failed to fetch users from database."}), 500
 
 
@@ -767,22 +699,21 @@ def admin_create_user():
             return jsonify({"error": "User with this email already exists"}), 400
         
         # Create new user
-        import json
         new_user = User(
             id=str(uuid.uuid4()),
             email=email,
             password_hash=hash_password(password),
             role=role,
-            settings=json.dumps({"unit": "us"})  # Default settings
+            settings=current_app.json.dumps({"unit": "us"})  # Default settings
         )
         
         db.session.add(new_user)
         db.session.commit()
         
         return jsonify(serialize_user(new_user)), 201
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error creating user: {e}")
+        current_app.logger.exception("Error creating user")
         return jsonify({"error": "Failed to create user"}), 500
 
 
@@ -791,9 +722,7 @@ def admin_create_user():
 def admin_update_user(user_id):
     """Admin endpoint to update a user's role"""
     try:
-        user = db.session.execute(
-            db.select(User).filter_by(id=user_id)
-        ).scalar_one_or_none()
+        user = db.session.get(User, user_id)
         
         if user is None:
             return jsonify({"error": "User not found."}), 404
@@ -809,9 +738,9 @@ def admin_update_user(user_id):
         
         db.session.commit()
         return jsonify(serialize_user(user))
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error updating user: {e}")
+        current_app.logger.exception("Error updating user")
         return jsonify({"error": "Failed to update user"}), 500
 
 
@@ -825,9 +754,7 @@ def admin_delete_user(user_id):
         if current_user and current_user.id == user_id:
             return jsonify({"error": "Cannot delete your own account"}), 400
         
-        user = db.session.execute(
-            db.select(User).filter_by(id=user_id)
-        ).scalar_one_or_none()
+        user = db.session.get(User, user_id)
         
         if user is None:
             return jsonify({"error": "User not found."}), 404
@@ -835,7 +762,7 @@ def admin_delete_user(user_id):
         db.session.delete(user)
         db.session.commit()
         return jsonify({"message": "User deleted successfully"}), 200
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error deleting user: {e}")
+        current_app.logger.exception("Error deleting user")
         return jsonify({"error": "Failed to delete user"}), 500
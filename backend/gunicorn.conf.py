@@ -13,9 +13,14 @@ bind = "0.0.0.0:8000"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
+# gevent workers multiplex many in-flight requests per process, so requests waiting on
+# MySQL round trips don't hold a whole worker; PyMySQL is pure Python and yields on
+# gevent's patched sockets. Set GUNICORN_WORKER_CLASS=sync to fall back to sync workers.
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+# Concurrent requests per gevent worker; beyond the SQLAlchemy pool (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# requests queue for a connection, so keep workers * pool within MySQL's max_connections
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
 timeout = 120
 keepalive = 5
 
@@ -52,7 +57,7 @@ raw_env = [
 # Startup/shutdown hooks
 def on_starting(server):
     """Called just before the master process is initialized."""
-    print(f"Starting Recipes Backend Server with {workers} workers...")
+    print(f"Starting Recipes Backend Server with {workers} {worker_class} workers...")
 
 
 def when_ready(server):
@@ -60,6 +65,13 @@ def when_ready(server):
     print("Server is ready. Accepting connections.")
 
 
+def post_worker_init(worker):
+    """Called just after a worker has initialized the application."""
+    # Build the per-process unit caches now rather than on the worker's first request
+    from app import warm_reference_caches
+    warm_reference_caches()
+
+
 def on_exit(server):
     """Called just before exiting."""
     print("Shutting down Recipes Backend Server...")
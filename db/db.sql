@@ -30,7 +30,8 @@ CREATE TABLE Ingredients (
     type_id INT,
     FOREIGN KEY (price_unit_id) REFERENCES Units(unit_id),
     FOREIGN KEY (default_unit_id) REFERENCES Units(unit_id),
-    FOREIGN KEY (type_id) REFERENCES Ingredient_Types(type_id) ON DELETE SET NULL
+    FOREIGN KEY (type_id) REFERENCES Ingredient_Types(type_id) ON DELETE SET NULL,
+    INDEX idx_ingredients_price_unit (price_unit_id)
 );
 
 -- 4. Recipes Table
@@ -42,7 +43,8 @@ CREATE TABLE Recipes (
     base_servings INT NOT NULL DEFAULT 4,
     parent_recipe_id INT,
     variant_notes VARCHAR(255),
-    FOREIGN KEY (parent_recipe_id) REFERENCES Recipes(recipe_id) ON DELETE SET NULL
+    FOREIGN KEY (parent_recipe_id) REFERENCES Recipes(recipe_id) ON DELETE SET NULL,
+    INDEX idx_recipes_parent (parent_recipe_id)
 );
 
 -- 5. Ingredient_Groups Table
@@ -65,7 +67,10 @@ CREATE TABLE Recipe_Ingredients (
     FOREIGN KEY (recipe_id) REFERENCES Recipes(recipe_id) ON DELETE CASCADE,
     FOREIGN KEY (ingredient_id) REFERENCES Ingredients(ingredient_id),
     FOREIGN KEY (unit_id) REFERENCES Units(unit_id),
-    FOREIGN KEY (group_id) REFERENCES Ingredient_Groups(group_id) ON DELETE SET NULL
+    FOREIGN KEY (group_id) REFERENCES Ingredient_Groups(group_id) ON DELETE SET NULL,
+    INDEX idx_recipe_ingredients_ingredient (ingredient_id),
+    INDEX idx_recipe_ingredients_unit (unit_id),
+    INDEX idx_recipe_ingredients_group (group_id)
 );
 
 -- 7. Tags Table
@@ -81,7 +86,8 @@ CREATE TABLE Recipe_Tags (
     tag_id INT NOT NULL,
     PRIMARY KEY (recipe_id, tag_id),
     FOREIGN KEY (recipe_id) REFERENCES Recipes(recipe_id) ON DELETE CASCADE,
-    FOREIGN KEY (tag_id) REFERENCES Tags(tag_id) ON DELETE CASCADE
+    FOREIGN KEY (tag_id) REFERENCES Tags(tag_id) ON DELETE CASCADE,
+    INDEX idx_recipe_tags_tag (tag_id)
 );
 
 -- 9. Ingredient_Prices Table